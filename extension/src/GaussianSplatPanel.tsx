@@ -16,11 +16,40 @@ function decodeJsonMsg(json: GaussianSplatMsgJson): GaussianSplatMsg {
     timestamp: json.timestamp,
     frame_id: json.frame_id,
     count: json.count,
-    positions: base64ToFloat32Array(json.positions_b64),
-    scales: base64ToFloat32Array(json.scales_b64),
-    rotations: base64ToFloat32Array(json.rotations_b64),
-    opacities: base64ToFloat32Array(json.opacities_b64),
-    colors: base64ToFloat32Array(json.colors_b64),
+    positions: base64ToFloat32Array(json.positions_b64, json.positions_dtype),
+    scales: base64ToFloat32Array(json.scales_b64, json.scales_dtype),
+    rotations: base64ToFloat32Array(json.rotations_b64, json.rotations_dtype),
+    opacities: base64ToFloat32Array(json.opacities_b64, json.opacities_dtype),
+    colors: base64ToFloat32Array(json.colors_b64, json.colors_dtype),
+  };
+}
+
+function concatFloat32(arrays: Float32Array[]): Float32Array {
+  let total = 0;
+  for (const a of arrays) {
+    total += a.length;
+  }
+  const out = new Float32Array(total);
+  let offset = 0;
+  for (const a of arrays) {
+    out.set(a, offset);
+    offset += a.length;
+  }
+  return out;
+}
+
+/** chunk_index 順に並んだチャンク群を 1 つの GaussianSplatMsg に連結する */
+function assembleChunks(chunks: GaussianSplatMsgJson[]): GaussianSplatMsg {
+  const decoded = chunks.map(decodeJsonMsg);
+  return {
+    timestamp: decoded[0]!.timestamp,
+    frame_id: decoded[0]!.frame_id,
+    count: decoded.reduce((sum, d) => sum + d.count, 0),
+    positions: concatFloat32(decoded.map((d) => d.positions)),
+    scales: concatFloat32(decoded.map((d) => d.scales)),
+    rotations: concatFloat32(decoded.map((d) => d.rotations)),
+    opacities: concatFloat32(decoded.map((d) => d.opacities)),
+    colors: concatFloat32(decoded.map((d) => d.colors)),
   };
 }
 
@@ -37,6 +66,10 @@ function GaussianSplatPanel({
   const [selectedTopic, setSelectedTopic] = useState<string>("");
   const canvasRef = useRef<HTMLCanvasElement>(null);
   const rendererRef = useRef<SplatRenderer | undefined>();
+  // チャンク分割されたメッセージを timestamp 単位で合流させるバッファ
+  const chunkBufRef = useRef<
+    { timestamp: number; chunks: Map<number, GaussianSplatMsgJson> } | undefined
+  >();
 
   useLayoutEffect(() => {
     context.onRender = (renderState, done) => {
@@ -49,14 +82,34 @@ function GaussianSplatPanel({
 
       // topic モードで currentFrame にメッセージがある場合
       if (renderState.currentFrame && renderState.currentFrame.length > 0) {
-        const lastMsg = renderState.currentFrame[renderState.currentFrame.length - 1] as
-          | MessageEvent<GaussianSplatMsgJson>
-          | undefined;
-        if (lastMsg?.message) {
+        for (const ev of renderState.currentFrame as readonly MessageEvent<GaussianSplatMsgJson>[]) {
+          const msg = ev.message;
+          if (!msg) {
+            continue;
+          }
           try {
-            const decoded = decodeJsonMsg(lastMsg.message);
-            setSplatData(decoded);
-            setStatus(`Topic: ${decoded.count.toLocaleString()} splats`);
+            const total = msg.total_chunks ?? 1;
+            if (total <= 1) {
+              const decoded = decodeJsonMsg(msg);
+              setSplatData(decoded);
+              setStatus(`Topic: ${decoded.count.toLocaleString()} splats`);
+              continue;
+            }
+            // 全チャンクが揃うまで timestamp 単位でバッファする
+            if (chunkBufRef.current?.timestamp !== msg.timestamp) {
+              chunkBufRef.current = { timestamp: msg.timestamp, chunks: new Map() };
+            }
+            const buf = chunkBufRef.current;
+            buf.chunks.set(msg.chunk_index ?? 0, msg);
+            if (buf.chunks.size === total) {
+              const ordered = [...buf.chunks.entries()]
+                .sort((a, b) => a[0] - b[0])
+                .map(([, m]) => m);
+              const decoded = assembleChunks(ordered);
+              setSplatData(decoded);
+              setStatus(`Topic: ${decoded.count.toLocaleString()} splats`);
+              chunkBufRef.current = undefined;
+            }
           } catch (e) {
             console.error("[GS Viewer] Decode error:", e);
           }
@@ -1,3 +1,5 @@
+import { B64Dtype } from "../utils/base64";
+
 /** GaussianSplatMsg の JSON Schema 名（MCAP / Foxglove で使用） */
 export const GAUSSIAN_SPLAT_SCHEMA_NAME = "gs_debug_viewer/GaussianSplatMsg";
 
@@ -12,12 +14,23 @@ export const GAUSSIAN_SPLAT_JSON_SCHEMA = {
     timestamp: { type: "number" },
     frame_id: { type: "string" },
     count: { type: "integer" },
-    // Float32Array は base64 文字列として格納
+    // 配列は base64 文字列として格納
     positions_b64: { type: "string" },
     scales_b64: { type: "string" },
     rotations_b64: { type: "string" },
     opacities_b64: { type: "string" },
     colors_b64: { type: "string" },
+    // 各配列の要素型 (float32 / float16 / uint8)。省略時は float32。
+    // uint8 は [0,1] を 255 で正規化した値
+    positions_dtype: { type: "string" },
+    scales_dtype: { type: "string" },
+    rotations_dtype: { type: "string" },
+    opacities_dtype: { type: "string" },
+    colors_dtype: { type: "string" },
+    // チャンク分割。count はチャンク内のスプラット数になり、
+    // 受信側は chunk_index 順に連結する。省略時は単一チャンク
+    chunk_index: { type: "integer" },
+    total_chunks: { type: "integer" },
   },
   required: ["timestamp", "frame_id", "count", "positions_b64", "scales_b64", "rotations_b64", "opacities_b64", "colors_b64"],
 } as const;
@@ -32,4 +45,11 @@ export interface GaussianSplatMsgJson {
   rotations_b64: string;
   opacities_b64: string;
   colors_b64: string;
+  positions_dtype?: B64Dtype;
+  scales_dtype?: B64Dtype;
+  rotations_dtype?: B64Dtype;
+  opacities_dtype?: B64Dtype;
+  colors_dtype?: B64Dtype;
+  chunk_index?: number;
+  total_chunks?: number;
 }
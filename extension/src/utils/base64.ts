@@ -1,11 +1,47 @@
-/** base64 文字列 → Float32Array */
-export function base64ToFloat32Array(b64: string): Float32Array {
+/** base64 でエンコードされた配列の要素型 */
+export type B64Dtype = "float32" | "float16" | "uint8";
+
+/** base64 文字列 → Float32Array (dtype に応じてデコード) */
+export function base64ToFloat32Array(b64: string, dtype: B64Dtype = "float32"): Float32Array {
   const binary = atob(b64);
   const bytes = new Uint8Array(binary.length);
   for (let i = 0; i < binary.length; i++) {
     bytes[i] = binary.charCodeAt(i);
   }
-  return new Float32Array(bytes.buffer);
+  switch (dtype) {
+    case "uint8": {
+      // uint8 は [0,1] を 255 で正規化した値 (colors / opacities)
+      const out = new Float32Array(bytes.length);
+      for (let i = 0; i < bytes.length; i++) {
+        out[i] = bytes[i]! / 255;
+      }
+      return out;
+    }
+    case "float16": {
+      const u16 = new Uint16Array(bytes.buffer);
+      const out = new Float32Array(u16.length);
+      for (let i = 0; i < u16.length; i++) {
+        out[i] = float16BitsToNumber(u16[i]!);
+      }
+      return out;
+    }
+    default:
+      return new Float32Array(bytes.buffer);
+  }
+}
+
+/** IEEE 754 half のビット表現 → number */
+function float16BitsToNumber(h: number): number {
+  const sign = (h & 0x8000) !== 0 ? -1 : 1;
+  const exp = (h >> 10) & 0x1f;
+  const frac = h & 0x03ff;
+  if (exp === 0) {
+    return sign * frac * 2 ** -24; // subnormal
+  }
+  if (exp === 31) {
+    return frac === 0 ? sign * Infinity : NaN;
+  }
+  return sign * (1024 + frac) * 2 ** (exp - 25);
 }
 
 /** Float32Array → base64 文字列 */
@@ -15,20 +15,45 @@ Usage:
 
 import argparse
 import base64
+import io
 import json
+import math
+import mmap
+import os
+import queue
 import struct
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import numpy as np
 
 try:
-    from mcap.writer import Writer
+    from mcap.writer import CompressionType, Writer
 except ImportError:
     print("Error: mcap package not found. Install with: pip install mcap", file=sys.stderr)
     sys.exit(1)
 
+try:
+    # テンポラリなし・float64 経由なしの C 実装 sigmoid
+    from scipy.special import expit
+except ImportError:
+    expit = None
+
+try:
+    # あれば全活性化を 1 つの並列カーネルに融合する
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+try:
+    # AVX2/AVX-512 の SIMD base64 実装 (stdlib のスカラ実装より桁違いに速い)
+    import pybase64
+except ImportError:
+    pybase64 = None
+
 # Schema
 SCHEMA_NAME = "gs_debug_viewer/GaussianSplatMsg"
 SCHEMA_ENCODING = "jsonschema"
@@ -43,6 +68,17 @@ SCHEMA_DATA = json.dumps({
         "rotations_b64": {"type": "string"},
         "opacities_b64": {"type": "string"},
         "colors_b64": {"type": "string"},
+        # 各配列の要素型 (float32 / float16 / uint8)。省略時は float32。
+        # uint8 は [0,1] を 255 で正規化した値
+        "positions_dtype": {"type": "string"},
+        "scales_dtype": {"type": "string"},
+        "rotations_dtype": {"type": "string"},
+        "opacities_dtype": {"type": "string"},
+        "colors_dtype": {"type": "string"},
+        # チャンク分割。count はチャンク内のスプラット数になり、
+        # 受信側は chunk_index 順に連結する。省略時は単一チャンク
+        "chunk_index": {"type": "integer"},
+        "total_chunks": {"type": "integer"},
     },
     "required": [
         "timestamp", "frame_id", "count",
@@ -51,126 +87,324 @@ SCHEMA_DATA = json.dumps({
     ],
 }).encode()
 
+# TF static schema (tf2_msgs/msg/TFMessage)
+# 標準の ROS 2 スキーマなので、手書き JSON Schema ではなく ros2msg + CDR で
+# 記録する。Foxglove / Lichtblick の TF 表示がネイティブに解釈できる
+TF_SCHEMA_NAME = "tf2_msgs/msg/TFMessage"
+TF_SCHEMA_DATA = b"""geometry_msgs/TransformStamped[] transforms
+
+================================================================================
+MSG: geometry_msgs/TransformStamped
+std_msgs/Header header
+string child_frame_id
+geometry_msgs/Transform transform
+
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+string frame_id
+
+================================================================================
+MSG: builtin_interfaces/Time
+int32 sec
+uint32 nanosec
+
+================================================================================
+MSG: geometry_msgs/Transform
+geometry_msgs/Vector3 translation
+geometry_msgs/Quaternion rotation
+
+================================================================================
+MSG: geometry_msgs/Vector3
+float64 x
+float64 y
+float64 z
+
+================================================================================
+MSG: geometry_msgs/Quaternion
+float64 x
+float64 y
+float64 z
+float64 w
+"""
+
 # SH C0 coefficient
 SH_C0 = 0.28209479177387814
 
-
-def parse_ply_header(f) -> tuple[int, list[str], int]:
+# 1 メッセージあたりのスプラット数 (デフォルト)。
+# 1 つの巨大 JSON を作らず、ピークメモリを O(chunk) に抑える
+DEFAULT_CHUNK_SPLATS = 1_000_000
+
+# 活性化カーネルに渡すカラムの並び
+KERNEL_COLUMNS = (
+    "x", "y", "z",
+    "f_dc_0", "f_dc_1", "f_dc_2",
+    "opacity",
+    "scale_0", "scale_1", "scale_2",
+    "rot_0", "rot_1", "rot_2", "rot_3",
+)
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def activate_kernel(raw, cols, positions, colors, opacities, scales, rotations):
+        """全活性化を行単位で融合した並列カーネル (各入力行を 1 回だけ読む)"""
+        for i in prange(raw.shape[0]):
+            positions[i, 0] = raw[i, cols[0]]
+            positions[i, 1] = raw[i, cols[1]]
+            positions[i, 2] = raw[i, cols[2]]
+
+            for k in range(3):
+                c = 0.5 + SH_C0 * raw[i, cols[3 + k]]
+                colors[i, k] = min(max(c, 0.0), 1.0)
+
+            opacities[i] = 1.0 / (1.0 + math.exp(-raw[i, cols[6]]))
+
+            for k in range(3):
+                scales[i, k] = math.exp(raw[i, cols[7 + k]])
+
+            q0 = raw[i, cols[10]]
+            q1 = raw[i, cols[11]]
+            q2 = raw[i, cols[12]]
+            q3 = raw[i, cols[13]]
+            inv = 1.0 / math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3 + 1e-20)
+            rotations[i, 0] = q0 * inv
+            rotations[i, 1] = q1 * inv
+            rotations[i, 2] = q2 * inv
+            rotations[i, 3] = q3 * inv
+else:
+    activate_kernel = None
+
+
+def parse_ply_header(mm: mmap.mmap) -> tuple[int, list[str], int]:
     """PLY ヘッダを解析して (vertex_count, property_names, header_size) を返す"""
+    # ヘッダは先頭の数 KB に収まるので、行単位の read ではなく
+    # end_header を一発で探してまとめてデコードする
+    marker = b"\nend_header\n"
+    end = mm.find(marker, 0, 8192)
+    if end < 0:
+        raise ValueError("Invalid PLY: end_header not found")
+    header_size = end + len(marker)
+
     properties = []
     vertex_count = 0
-    header_size = 0
-
-    while True:
-        line = f.readline()
-        header_size += len(line)
-        line = line.decode("ascii").strip()
-
+    for line in mm[:end].decode("ascii").splitlines():
+        line = line.strip()
         if line.startswith("element vertex"):
             vertex_count = int(line.split()[2])
         elif line.startswith("property float"):
             properties.append(line.split()[2])
-        elif line == "end_header":
-            break
 
     return vertex_count, properties, header_size
 
 
-def parse_ply(ply_path: str) -> dict:
-    """PLY を読み込んで変換済みデータを返す"""
-    with open(ply_path, "rb") as f:
-        vertex_count, properties, _ = parse_ply_header(f)
-
-        stride = len(properties)
-        raw = np.frombuffer(
-            f.read(vertex_count * stride * 4),
-            dtype=np.float32,
-        ).reshape(vertex_count, stride)
+def activate_block(raw: np.ndarray, out: dict) -> None:
+    """structured array のブロックに活性化関数を適用する (NumPy fallback)。
 
-    # プロパティインデックス
-    def idx(name: str) -> int:
-        return properties.index(name)
-
-    # Position (そのまま)
-    positions = raw[:, [idx("x"), idx("y"), idx("z")]].copy()
+    結果は out の各バッファへ in-place で書き込み、新規確保はしない。
+    """
+    # Position (そのまま)。出力バッファへ列単位で直接書き込む
+    positions = out["positions"]
+    positions[:, 0] = raw["x"]
+    positions[:, 1] = raw["y"]
+    positions[:, 2] = raw["z"]
 
     # Color: SH DC → RGB
-    f_dc = raw[:, [idx("f_dc_0"), idx("f_dc_1"), idx("f_dc_2")]]
-    colors = np.clip(0.5 + SH_C0 * f_dc, 0.0, 1.0).astype(np.float32)
+    # out= で 1 バッファに書き込み、中間テンポラリ (積・和・clip 結果) を作らない
+    colors = out["colors"]
+    colors[:, 0] = raw["f_dc_0"]
+    colors[:, 1] = raw["f_dc_1"]
+    colors[:, 2] = raw["f_dc_2"]
+    np.multiply(colors, np.float32(SH_C0), out=colors)
+    np.add(colors, np.float32(0.5), out=colors)
+    np.clip(colors, 0.0, 1.0, out=colors)
 
     # Opacity: sigmoid
-    raw_opacity = raw[:, idx("opacity")]
-    opacities = (1.0 / (1.0 + np.exp(-raw_opacity))).astype(np.float32)
-
-    # Scale: exp
-    scales = np.exp(raw[:, [idx("scale_0"), idx("scale_1"), idx("scale_2")]]).astype(np.float32)
+    opacities = out["opacities"]
+    if expit is not None:
+        expit(raw["opacity"], out=opacities)
+    else:
+        # SciPy がない場合も out= で 1 バッファに収める
+        np.negative(raw["opacity"], out=opacities)
+        np.exp(opacities, out=opacities)
+        np.add(opacities, np.float32(1.0), out=opacities)
+        np.reciprocal(opacities, out=opacities)
+
+    # Scale: exp (in-place)
+    scales = out["scales"]
+    scales[:, 0] = raw["scale_0"]
+    scales[:, 1] = raw["scale_1"]
+    scales[:, 2] = raw["scale_2"]
+    np.exp(scales, out=scales)
 
     # Rotation: normalize quaternion
-    quats = raw[:, [idx("rot_0"), idx("rot_1"), idx("rot_2"), idx("rot_3")]].copy()
-    norms = np.linalg.norm(quats, axis=1, keepdims=True)
-    norms = np.maximum(norms, 1e-10)
-    rotations = (quats / norms).astype(np.float32)
-
-    return {
-        "count": vertex_count,
-        "positions": positions,
-        "colors": colors,
-        "opacities": opacities,
-        "scales": scales,
-        "rotations": rotations,
-    }
-
-
-def float32_to_b64(arr: np.ndarray) -> str:
-    """numpy float32 array → base64 string"""
-    return base64.b64encode(arr.tobytes()).decode("ascii")
-
-
-def write_mcap(data: dict, output_path: str, timestamp: float, frame_id: str):
-    """MCAP ファイルに書き出す"""
-    with open(output_path, "wb") as f:
-        writer = Writer(f)
-        writer.start()
+    # einsum で二乗和を 1 パスに融合し、逆数を掛ける (sqrt + maximum +
+    # broadcast 除算よりパス数もテンポラリも少ない)
+    rotations = out["rotations"]
+    rotations[:, 0] = raw["rot_0"]
+    rotations[:, 1] = raw["rot_1"]
+    rotations[:, 2] = raw["rot_2"]
+    rotations[:, 3] = raw["rot_3"]
+    sq = np.einsum("ij,ij->i", rotations, rotations)
+    inv = np.reciprocal(np.sqrt(sq + np.float32(1e-20)))
+    np.multiply(rotations, inv[:, None], out=rotations)
+
+
+def parse_ply_chunks(ply_path: str, chunk_rows: int = DEFAULT_CHUNK_SPLATS):
+    """PLY を読み込み、変換済みチャンクを chunk_rows 行ごとに yield する。
+
+    ジェネレータにしているのは、parse (DRAM 帯域) と MCAP 書き込み
+    (ディスク帯域) をパイプラインで重ねられるようにするため。
+    """
+    fd = os.open(ply_path, os.O_RDONLY)
+    try:
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+
+    # 先頭から一度だけ舐めるアクセスパターンなので、カーネルに
+    # 先読みを効かせる (非 Linux では madvise がない場合もある)
+    if hasattr(mm, "madvise"):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+        mm.madvise(mmap.MADV_WILLNEED)
+
+    vertex_count, properties, header_size = parse_ply_header(mm)
+
+    # 全 property が float32 なので名前付きフィールドの structured dtype にする。
+    # raw["x"] 等がコピーなしの strided ビューになり、
+    # fancy-index による gather コピーを避けられる
+    dtype = np.dtype([(p, "<f4") for p in properties])
+    # mmap を直接ビューするので中間 bytes のコピーが発生しない
+    # (OS が必要なページをオンデマンドで読み込む)
+    raw = np.frombuffer(mm, dtype=dtype, count=vertex_count, offset=header_size)
+
+    total_chunks = max(1, -(-vertex_count // chunk_rows))
+
+    if activate_kernel is not None:
+        # list.index は O(P) の線形走査 (SH 係数込みで P は 60 超)。
+        # 名前 → カラム番号の dict を一度だけ作る
+        pidx = {name: i for i, name in enumerate(properties)}
+        cols = tuple(pidx[n] for n in KERNEL_COLUMNS)
+        raw_2d = raw.view(np.float32).reshape(vertex_count, len(properties))
+
+    # 出力バッファはチャンクごとに確保せず、プールで使い回す。
+    # 消費側がエンコードを終えて release() を呼ぶとセットが返却される。
+    # まだ返ってきていなければ新しいセットを確保するだけで、壊れはしない
+    pool: queue.Queue = queue.Queue()
+
+    def alloc_buffers() -> dict:
+        return {
+            "positions": np.empty((chunk_rows, 3), dtype=np.float32),
+            "colors": np.empty((chunk_rows, 3), dtype=np.float32),
+            "opacities": np.empty(chunk_rows, dtype=np.float32),
+            "scales": np.empty((chunk_rows, 3), dtype=np.float32),
+            "rotations": np.empty((chunk_rows, 4), dtype=np.float32),
+        }
 
-        # --- TF static schema (tf2_msgs/TFMessage) ---
-        tf_schema_data = json.dumps({
-            "type": "object",
-            "properties": {
-                "transforms": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "header": {
-                                "type": "object",
-                                "properties": {
-                                    "stamp": {"type": "object", "properties": {"sec": {"type": "integer"}, "nsec": {"type": "integer"}}},
-                                    "frame_id": {"type": "string"},
-                                },
-                            },
-                            "child_frame_id": {"type": "string"},
-                            "transform": {
-                                "type": "object",
-                                "properties": {
-                                    "translation": {"type": "object", "properties": {"x": {"type": "number"}, "y": {"type": "number"}, "z": {"type": "number"}}},
-                                    "rotation": {"type": "object", "properties": {"x": {"type": "number"}, "y": {"type": "number"}, "z": {"type": "number"}, "w": {"type": "number"}}},
-                                },
-                            },
-                        },
-                    },
-                },
-            },
-        }).encode()
+    for ci in range(total_chunks):
+        start = ci * chunk_rows
+        stop = min(start + chunk_rows, vertex_count)
+        n = stop - start
+
+        try:
+            bufs = pool.get_nowait()
+        except queue.Empty:
+            bufs = alloc_buffers()
+        chunk = {key: arr[:n] for key, arr in bufs.items()}
+
+        if activate_kernel is not None:
+            # Numba カーネル: 各行を 1 回だけ読み、全出力を同時に書く
+            activate_kernel(
+                raw_2d[start:stop], cols,
+                chunk["positions"], chunk["colors"], chunk["opacities"],
+                chunk["scales"], chunk["rotations"],
+            )
+        else:
+            activate_block(raw[start:stop], chunk)
+
+        chunk["count"] = n
+        chunk["chunk_index"] = ci
+        chunk["total_chunks"] = total_chunks
+        chunk["release"] = lambda bufs=bufs: pool.put(bufs)
+        yield chunk
+
+
+def serialize_tf_static_cdr(stamp_sec: int, stamp_nsec: int, frame_id: str) -> bytes:
+    """world → frame_id の恒等変換 1 件を持つ TFMessage を CDR で直列化する。
+
+    メッセージは数十バイトの固定構造なので、rosidl に依存せず
+    struct.pack で手詰めする。アラインメントはエンカプセレーション
+    ヘッダ直後を 0 として数える (XCDR1, little-endian)。
+    """
+    body = bytearray()
+
+    def align(size: int):
+        body.extend(b"\x00" * (-len(body) % size))
+
+    def write_string(s: str):
+        data = s.encode() + b"\x00"
+        align(4)
+        body.extend(struct.pack("<I", len(data)))
+        body.extend(data)
+
+    body.extend(struct.pack("<I", 1))                       # transforms 配列長
+    body.extend(struct.pack("<iI", stamp_sec, stamp_nsec))  # header.stamp
+    write_string("world")                                   # header.frame_id
+    write_string(frame_id)                                  # child_frame_id
+    align(8)
+    body.extend(struct.pack("<3d", 0.0, 0.0, 0.0))          # translation
+    body.extend(struct.pack("<4d", 0.0, 0.0, 0.0, 1.0))     # rotation (xyzw)
+
+    # encapsulation: CDR_LE
+    return b"\x00\x01\x00\x00" + bytes(body)
+
+
+def quantize_payload(data: dict) -> dict:
+    """シリアライズ前にペイロードを量子化する。
+
+    colors / opacities は [0,1] に収まっているので uint8 で視覚的に同等、
+    positions / scales / rotations は可視化用途には float16 で十分。
+    ペイロードは float32 比で約 1/3 になる。
+    """
+    out = dict(data)
+    for key in ("colors", "opacities"):
+        out[key] = (data[key] * np.float32(255.0) + np.float32(0.5)).astype(np.uint8)
+    for key in ("positions", "scales", "rotations"):
+        out[key] = data[key].astype(np.float16)
+    return out
+
+
+def array_to_b64(arr: np.ndarray) -> bytes:
+    """numpy array → base64 (ASCII bytes)"""
+    if pybase64 is not None:
+        # buffer protocol を直接受け取るので tobytes() のコピーも不要
+        return pybase64.b64encode(arr)
+    # stdlib も buffer protocol を受け取れる。memoryview を渡して
+    # tobytes() による全データの複製を避ける
+    return base64.b64encode(memoryview(arr).cast("B"))
+
+
+def write_mcap(chunks, output_path: str, timestamp: float, frame_id: str):
+    """変換済みチャンクのイテラブルを順に MCAP へ書き出す"""
+    with open(output_path, "wb", buffering=0) as raw:
+        # MCAP レコード単位の小さい write を 8 MiB にまとめてから
+        # syscall に落とす (デフォルトの 8 KiB バッファでは GB 級の
+        # 出力で write が 10 万回単位になる)
+        f = io.BufferedWriter(raw, buffer_size=8 * 1024 * 1024)
+        # zstd チャンク圧縮で base64 分の冗長性を吸収する。
+        # チャンクを大きめにすると圧縮率も下がりにくい
+        writer = Writer(f, compression=CompressionType.ZSTD, chunk_size=8 * 1024 * 1024)
+        writer.start()
 
+        # --- TF static schema (tf2_msgs/msg/TFMessage, ros2msg + CDR) ---
         tf_schema_id = writer.register_schema(
-            name="tf2_msgs/TFMessage",
-            encoding="jsonschema",
-            data=tf_schema_data,
+            name=TF_SCHEMA_NAME,
+            encoding="ros2msg",
+            data=TF_SCHEMA_DATA,
         )
 
         tf_channel_id = writer.register_channel(
             topic="/tf_static",
-            message_encoding="json",
+            message_encoding="cdr",
             schema_id=tf_schema_id,
         )
 
@@ -192,20 +426,7 @@ def write_mcap(data: dict, output_path: str, timestamp: float, frame_id: str):
         stamp_nsec = int((timestamp - stamp_sec) * 1e9)
 
         # Write TF static: world → frame_id (identity transform)
-        tf_msg = {
-            "transforms": [{
-                "header": {
-                    "stamp": {"sec": stamp_sec, "nsec": stamp_nsec},
-                    "frame_id": "world",
-                },
-                "child_frame_id": frame_id,
-                "transform": {
-                    "translation": {"x": 0.0, "y": 0.0, "z": 0.0},
-                    "rotation": {"x": 0.0, "y": 0.0, "z": 0.0, "w": 1.0},
-                },
-            }],
-        }
-        tf_bytes = json.dumps(tf_msg).encode()
+        tf_bytes = serialize_tf_static_cdr(stamp_sec, stamp_nsec, frame_id)
         writer.add_message(
             channel_id=tf_channel_id,
             log_time=timestamp_ns,
@@ -213,28 +434,55 @@ def write_mcap(data: dict, output_path: str, timestamp: float, frame_id: str):
             publish_time=timestamp_ns,
         )
 
-        # Write Gaussian Splat message
-        msg = {
-            "timestamp": timestamp,
-            "frame_id": frame_id,
-            "count": data["count"],
-            "positions_b64": float32_to_b64(data["positions"]),
-            "scales_b64": float32_to_b64(data["scales"]),
-            "rotations_b64": float32_to_b64(data["rotations"]),
-            "opacities_b64": float32_to_b64(data["opacities"]),
-            "colors_b64": float32_to_b64(data["colors"]),
-        }
-
-        msg_bytes = json.dumps(msg).encode()
-
-        writer.add_message(
-            channel_id=channel_id,
-            log_time=timestamp_ns,
-            data=msg_bytes,
-            publish_time=timestamp_ns,
-        )
+        # Write Gaussian Splat messages (チャンク分割)
+        # 全スプラットを 1 つの巨大 JSON にせず、チャンクごとの
+        # メッセージに分けてピークメモリを O(chunk) に抑える
+        keys = ("positions", "scales", "rotations", "opacities", "colors")
+
+        with ThreadPoolExecutor(max_workers=len(keys)) as ex:
+            for chunk in chunks:
+                ci = chunk["chunk_index"]
+
+                # base64 値はエスケープ不要な ASCII なので、json.dumps に
+                # 巨大文字列を再走査させず、バイト列の連結で組み立てる。
+                # 5 配列のエンコードは独立で、base64 の C ループは GIL を
+                # 離すのでスレッドで並列化できる
+                b64 = dict(zip(keys, ex.map(
+                    array_to_b64, (chunk[k] for k in keys),
+                )))
+
+                # エンコードが済めば元バッファは不要。プール利用時は
+                # ここで parser 側に返却する
+                release = chunk.get("release")
+                if release is not None:
+                    release()
+
+                parts = [
+                    b'{"timestamp":', repr(timestamp).encode(),
+                    b',"frame_id":', json.dumps(frame_id).encode(),
+                    b',"count":', str(chunk["count"]).encode(),
+                    b',"chunk_index":', str(ci).encode(),
+                    b',"total_chunks":', str(chunk["total_chunks"]).encode(),
+                ]
+                for key in keys:
+                    parts.append(f',"{key}_b64":"'.encode())
+                    parts.append(b64[key])
+                    parts.append(f'","{key}_dtype":"{chunk[key].dtype.name}"'.encode())
+                parts.append(b"}")
+                msg_bytes = b"".join(parts)
+
+                writer.add_message(
+                    channel_id=channel_id,
+                    log_time=timestamp_ns + ci,
+                    data=msg_bytes,
+                    publish_time=timestamp_ns + ci,
+                )
 
         writer.finish()
+        f.flush()
+        # 再読されない出力ページをページキャッシュから手放す
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(raw.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
 
     # ファイルサイズ表示
     size_mb = Path(output_path).stat().st_size / (1024 * 1024)
@@ -249,6 +497,10 @@ def main():
                         help="Unix timestamp (default: current time)")
     parser.add_argument("--frame-id", type=str, default="map",
                         help="Coordinate frame ID (default: map)")
+    parser.add_argument("--no-quantize", action="store_true",
+                        help="Keep all arrays as float32 (default: quantize to uint8/float16)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SPLATS,
+                        help=f"Splats per MCAP message (default: {DEFAULT_CHUNK_SPLATS})")
     args = parser.parse_args()
 
     if not Path(args.input).exists():
@@ -258,15 +510,69 @@ def main():
     timestamp = args.timestamp if args.timestamp is not None else time.time()
 
     print(f"Parsing PLY: {args.input}")
-    data = parse_ply(args.input)
-    print(f"  Vertices: {data['count']:,}")
-    print(f"  Position range: [{data['positions'].min():.3f}, {data['positions'].max():.3f}]")
-    print(f"  Color range: [{data['colors'].min():.3f}, {data['colors'].max():.3f}]")
-    print(f"  Opacity range: [{data['opacities'].min():.3f}, {data['opacities'].max():.3f}]")
-    print(f"  Scale range: [{data['scales'].min():.6f}, {data['scales'].max():.6f}]")
-
     print(f"Writing MCAP: {args.output}")
-    write_mcap(data, args.output, timestamp, args.frame_id)
+
+    # parse (DRAM 帯域) と MCAP 書き込み (ディスク帯域) を重ねる。
+    # 変換は main スレッドに残し (Numba の並列カーネルはサブスレッド
+    # からの起動が安全でない)、writer スレッドが有限 Queue から消費する
+    chunk_queue: queue.Queue = queue.Queue(maxsize=4)
+    stats = {"count": 0, "ranges": {}}
+    errors = []
+
+    def update_stats(chunk):
+        stats["count"] += chunk["count"]
+        for key in ("positions", "colors", "opacities", "scales"):
+            lo = float(chunk[key].min())
+            hi = float(chunk[key].max())
+            cur = stats["ranges"].get(key)
+            stats["ranges"][key] = (
+                (lo, hi) if cur is None else (min(cur[0], lo), max(cur[1], hi))
+            )
+
+    def write_worker():
+        # consume() と drain は同じ writer スレッド内で動くので、
+        # 番兵を消費済みかどうかは単なるフラグで共有できる
+        drained = False
+
+        def consume():
+            nonlocal drained
+            while True:
+                chunk = chunk_queue.get()
+                if chunk is None:
+                    drained = True
+                    return
+                yield chunk
+
+        try:
+            write_mcap(consume(), args.output, timestamp, args.frame_id)
+        except BaseException as e:
+            errors.append(e)
+            # producer が full Queue で詰まらないよう番兵まで読み捨てる。
+            # 番兵消費後の失敗 (finish/flush 時の ENOSPC 等) で Queue は
+            # もう増えないので、その場合にブロックしてはいけない
+            while not drained and chunk_queue.get() is not None:
+                pass
+
+    writer_thread = threading.Thread(target=write_worker)
+    writer_thread.start()
+    try:
+        for chunk in parse_ply_chunks(args.input, args.chunk_size):
+            update_stats(chunk)
+            if not args.no_quantize:
+                chunk = quantize_payload(chunk)
+            chunk_queue.put(chunk)
+    finally:
+        chunk_queue.put(None)
+        writer_thread.join()
+    if errors:
+        raise errors[0]
+
+    ranges = stats["ranges"]
+    print(f"  Vertices: {stats['count']:,}")
+    print(f"  Position range: [{ranges['positions'][0]:.3f}, {ranges['positions'][1]:.3f}]")
+    print(f"  Color range: [{ranges['colors'][0]:.3f}, {ranges['colors'][1]:.3f}]")
+    print(f"  Opacity range: [{ranges['opacities'][0]:.3f}, {ranges['opacities'][1]:.3f}]")
+    print(f"  Scale range: [{ranges['scales'][0]:.6f}, {ranges['scales'][1]:.6f}]")
     print("Done!")
 
 